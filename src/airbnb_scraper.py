@@ -6,7 +6,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-import pandas as pd
 import logging
 import os
 import json
@@ -16,12 +15,22 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keyword tuples built once at import; the matcher lambdas below run for
+# every span on every card, so they should not rebuild these lists per call
+PROPERTY_TYPE_WORDS = ("apartamento", "casa", "habitación")
+BEDS_ROOMS_WORDS = ("dormitorio", "cama", "baño")
+
 
 # Function to parse command-line arguments
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Airbnb Scraper")
     parser.add_argument(
-        "--url", type=str, required=True, help="URL to scrape Airbnb listings from"
+        "--url",
+        type=str,
+        action="append",
+        required=True,
+        help="URL to scrape Airbnb listings from (repeat the flag to scrape "
+        "several URLs with a single browser session)",
     )
     parser.add_argument(
         "--format",
@@ -40,11 +49,11 @@ def wait_for_element(driver, by, value, timeout=10):
     )
 
 
-# Function to extract data
+# Generator that extracts data; callers feed it straight into list.extend
+# so no intermediate per-page list is built
 def extract_data(driver):
-    listings_data = []
     html_content = driver.page_source
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = BeautifulSoup(html_content, "lxml")
     all_listings = soup.find_all("div", {"data-testid": "card-container"})
 
     for item in all_listings:
@@ -57,7 +66,7 @@ def extract_data(driver):
                 title_element.text.strip() if title_element else None
             )
         except AttributeError as e:
-            logger.warning(f"Error extracting property title: {str(e)}")
+            logger.warning("Error extracting property title: %s", e)
             listing["property_title"] = None
 
         # Extract Price
@@ -73,7 +82,7 @@ def extract_data(driver):
             else:
                 listing["price_with_tax"] = None
         except AttributeError as e:
-            logger.warning(f"Error extracting price: {str(e)}")
+            logger.warning("Error extracting price: %s", e)
             listing["price_with_tax"] = None
 
         # Extract Property Type
@@ -81,16 +90,13 @@ def extract_data(driver):
             property_type_element = item.find(
                 "span",
                 string=lambda text: text
-                and any(
-                    word in text.lower()
-                    for word in ["apartamento", "casa", "habitación"]
-                ),
+                and any(word in text.lower() for word in PROPERTY_TYPE_WORDS),
             )
             listing["property_type"] = (
                 property_type_element.text.strip() if property_type_element else None
             )
         except AttributeError as e:
-            logger.warning(f"Error extracting property type: {str(e)}")
+            logger.warning("Error extracting property type: %s", e)
             listing["property_type"] = None
 
         # Extract Beds and Rooms
@@ -98,20 +104,16 @@ def extract_data(driver):
             beds_rooms_element = item.find(
                 "span",
                 string=lambda text: text
-                and any(
-                    word in text.lower() for word in ["dormitorio", "cama", "baño"]
-                ),
+                and any(word in text.lower() for word in BEDS_ROOMS_WORDS),
             )
             listing["beds_rooms"] = (
                 beds_rooms_element.text.strip() if beds_rooms_element else None
             )
         except AttributeError as e:
-            logger.warning(f"Error extracting beds/rooms: {str(e)}")
+            logger.warning("Error extracting beds/rooms: %s", e)
             listing["beds_rooms"] = None
 
-        listings_data.append(listing)
-
-    return listings_data
+        yield listing
 
 
 # Function to handle popups
@@ -136,26 +138,30 @@ def save_data(listings_data, format):
     datetime_str = datetime.now().strftime("%Y%m%d_%H%M%S")
 
     if format in ["csv", "both"]:
+        # pandas is only needed for the CSV export and is slow to import, so
+        # defer it here to keep --help and json-only runs fast
+        import pandas as pd
+
         output_file_csv = os.path.join(output_dir, f"airbnb_{datetime_str}.csv")
         try:
             df = pd.DataFrame(listings_data)
             df.to_csv(output_file_csv, index=False, encoding="utf-8")
-            logger.info(f"Data saved to CSV: {output_file_csv}")
+            logger.info("Data saved to CSV: %s", output_file_csv)
         except Exception as e:
-            logger.error(f"Error saving to CSV: {str(e)}")
+            logger.error("Error saving to CSV: %s", e)
 
     if format in ["json", "both"]:
         output_file_json = os.path.join(output_dir, f"airbnb_{datetime_str}.json")
         try:
             with open(output_file_json, "w", encoding="utf-8") as json_file:
                 json.dump(listings_data, json_file, ensure_ascii=False, indent=4)
-            logger.info(f"Data saved to JSON: {output_file_json}")
+            logger.info("Data saved to JSON: %s", output_file_json)
         except Exception as e:
-            logger.error(f"Error saving to JSON: {str(e)}")
+            logger.error("Error saving to JSON: %s", e)
 
 
-# Main scraper function
-def scrape_airbnb(url, format):
+# Function to build the headless Chrome driver
+def create_driver():
     # ChromeDriver path for Ubuntu
     CHROMEDRIVER_PATH = "/usr/bin/chromedriver"
     service = Service(executable_path=CHROMEDRIVER_PATH)
@@ -164,9 +170,26 @@ def scrape_airbnb(url, format):
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
+    # The scraper only reads text out of the listing cards, so skip
+    # downloading and rendering images to cut page-load time and bandwidth
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    # Turn off background services (update checks, sync, translate,
+    # metrics uploads) that just burn CPU and network during the waits
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-component-update")
+    options.add_argument("--disable-sync")
+    options.add_argument("--disable-default-apps")
+    options.add_argument("--disable-features=Translate")
+    options.add_argument("--no-first-run")
+    options.add_argument("--metrics-recording-only")
+    options.add_experimental_option(
+        "prefs", {"profile.managed_default_content_settings.images": 2}
+    )
+    return webdriver.Chrome(service=service, options=options)
 
-    driver = webdriver.Chrome(service=service, options=options)
 
+# Function to scrape all result pages of one search URL with an existing driver
+def scrape_search(driver, url):
     listings_data = []
     page_limit = 20
     current_page = 1
@@ -176,7 +199,7 @@ def scrape_airbnb(url, format):
         wait_for_element(driver, By.CSS_SELECTOR, "[data-testid='card-container']")
 
         while current_page <= page_limit:
-            logger.info(f"Scraping page {current_page}")
+            logger.info("Scraping page %d", current_page)
             handle_popups(driver)
             listings_data.extend(extract_data(driver))
 
@@ -196,16 +219,24 @@ def scrape_airbnb(url, format):
                 logger.info("No 'Next' button found or not clickable. Ending scraping.")
                 break
             except Exception as e:
-                logger.error(f"Error while navigating to next page: {str(e)}")
+                logger.error("Error while navigating to next page: %s", e)
                 break
     except Exception as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: %s", e)
+
+    return listings_data
+
+
+# Main scraper function; reuses one browser across all requested URLs
+def scrape_airbnb(urls, format):
+    driver = create_driver()
+    try:
+        for url in urls:
+            listings_data = scrape_search(driver, url)
+            save_data(listings_data, format)
     finally:
         driver.quit()
 
-    # Save the scraped data
-    save_data(listings_data, format)
-
 
 # Entry point for the script
 if __name__ == "__main__":
@@ -1,9 +1,11 @@
 import argparse
 import asyncio
 import json
+import os
+import random
 import re
-from typing import Dict, List
-from urllib.parse import urljoin
+from typing import Dict, List, Tuple
+from urllib.parse import urljoin, urlparse
 import httpx
 from parsel import Selector
 from typing_extensions import TypedDict
@@ -11,12 +13,37 @@ import csv
 from datetime import datetime
 import logging
 
+try:
+    import orjson
+except ImportError:  # fall back to stdlib json if orjson is unavailable
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # uvloop is Linux/macOS only; stdlib loop works fine
+    uvloop = None
+
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 
+# Compiled once at import; named groups let a single scan of each feature
+# string pick up both the room count and the surface area
+FEATURE_RE = re.compile(r"(?P<rooms>\d+)\s*habitaciones?|(?P<size>\d+)\s*m²")
+
+# Strips thousands separators from price strings in one pass
+PRICE_TRANS = str.maketrans("", "", ".,")
+
+# Immutable pool of browser user agents; one is picked per run so repeated
+# runs do not always present the identical fingerprint
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/117.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
+)
+
 # Establish persistent HTTPX session with browser-like headers to avoid blocking
 BASE_HEADERS = {
-    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
+    "user-agent": USER_AGENTS[0],
     "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
     "accept-language": "en-US;en;q=0.9",
     "accept-encoding": "gzip, deflate, br",
@@ -44,13 +71,16 @@ def parse_property(response: httpx.Response) -> PropertyResult:
     data: PropertyResult = {}
     data["url"] = str(response.url)
     data["title"] = css("h1 .main-info__title-main::text")
+    if not data["title"]:
+        # Captcha/interstitial pages carry none of the listing markup, so
+        # skip the remaining selector work for this common reject path
+        return data
     data["location"] = css(".main-info__title-minor::text")
     data["currency"] = css(".info-data-price::text")
 
     price_str = css(".info-data-price span::text")
     if price_str:
-        price_str = price_str.replace(".", "").replace(",", "")
-        data["price"] = int(price_str)
+        data["price"] = int(price_str.translate(PRICE_TRANS))
     else:
         data["price"] = None
 
@@ -64,6 +94,10 @@ def parse_property(response: httpx.Response) -> PropertyResult:
     data["features"] = {}
     for feature_block in selector.css(".details-property-h2"):
         label = feature_block.xpath("text()").get()
+        if label is None:
+            # Headings without a direct text node would produce a None dict
+            # key, which orjson refuses to serialize
+            continue
         features = feature_block.xpath("following-sibling::div[1]//li")
         data["features"][label] = [
             "".join(feat.xpath(".//text()").getall()).strip() for feat in features
@@ -74,87 +108,126 @@ def parse_property(response: httpx.Response) -> PropertyResult:
     data["size_sqm"] = None
 
     for feature in basic_features:
-        if "habitaciones" in feature:
-            rooms_match = re.search(r"(\d+)\s*habitaciones?", feature)
-            if rooms_match:
-                data["rooms"] = int(rooms_match.group(1))
-
-        if "m²" in feature:
-            size_match = re.search(r"(\d+)\s*m²", feature)
-            if size_match:
-                data["size_sqm"] = int(size_match.group(1))
+        for match in FEATURE_RE.finditer(feature):
+            if match.lastgroup == "rooms":
+                data["rooms"] = int(match.group("rooms"))
+            else:
+                data["size_sqm"] = int(match.group("size"))
 
     return data
 
 
-async def extract_property_urls(
-    area_url: str, session: httpx.AsyncClient, delay: float
-) -> List[str]:
-    """Extract property URLs from an area page with a delay"""
-    try:
-        response = await session.get(area_url)
-        selector = Selector(text=response.text)
-        property_links = selector.css("article.item a.item-link::attr(href)").getall()
-        full_urls = [urljoin(area_url, link) for link in property_links]
-        await asyncio.sleep(delay)
-        return full_urls
-    except (httpx.ReadTimeout, httpx.RequestError) as e:
-        logging.error(f"Failed to retrieve area URL: {area_url}, Error: {str(e)}")
-        return []
+async def throttled_get(
+    session: httpx.AsyncClient, url: str, delay: float
+) -> httpx.Response:
+    """Fetch a URL while enforcing the politeness delay in parallel.
 
+    Every request in the scraper goes through here, so the inter-request
+    spacing is defined in exactly one place.
+    """
+    response, _ = await asyncio.gather(session.get(url), asyncio.sleep(delay))
+    return response
 
-async def get_next_page_url(
-    current_url: str, session: httpx.AsyncClient, delay: float
-) -> str:
-    """Get the URL of the next page with a delay"""
+
+async def extract_area_page(
+    area_url: str, session: httpx.AsyncClient, delay: float
+) -> Tuple[List[str], str]:
+    """Extract property URLs and the next page link from a single area page fetch"""
     try:
-        response = await session.get(current_url)
+        response = await throttled_get(session, area_url, delay)
         selector = Selector(text=response.text)
+        property_links = selector.css("article.item a.item-link::attr(href)").getall()
+        # Hrefs are site-relative paths, so a prefix concat avoids parsing
+        # both URLs through urljoin for every listing
+        origin = "https://" + urlparse(area_url).netloc
+        full_urls = [
+            origin + link if link.startswith("/") else urljoin(area_url, link)
+            for link in property_links
+        ]
         next_page_link = selector.css("a.icon-arrow-right-after::attr(href)").get()
-        await asyncio.sleep(delay)
-        return urljoin(current_url, next_page_link) if next_page_link else None
+        next_url = urljoin(area_url, next_page_link) if next_page_link else None
+        return full_urls, next_url
     except (httpx.ReadTimeout, httpx.RequestError) as e:
-        logging.error(
-            f"Failed to retrieve next page URL for: {current_url}, Error: {str(e)}"
-        )
-        return None
+        logging.error("Failed to retrieve area URL: %s, Error: %s", area_url, e)
+        return [], None
 
 
 async def scrape_properties(
-    urls: List[str], session: httpx.AsyncClient, delay: float
+    urls: List[str], session: httpx.AsyncClient, delay: float, concurrency: int = 3
 ) -> List[PropertyResult]:
-    """Scrape Idealista.com properties with a delay"""
-    properties = []
-    for url in urls:
-        for attempt in range(3):
-            try:
-                response = await session.get(url)
-                if response.status_code == 200:
-                    properties.append(parse_property(response))
-                else:
+    """Scrape Idealista.com properties with a bounded number of requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape_one(url: str) -> PropertyResult:
+        async with semaphore:
+            backoff = delay
+            for attempt in range(3):
+                try:
+                    response = await throttled_get(session, url, delay)
+                    if response.status_code == 200:
+                        return parse_property(response)
+                    if (
+                        response.status_code == 429 or response.status_code >= 500
+                    ) and attempt < 2:
+                        # 429s and transient server errors are worth retrying;
+                        # honor the server's Retry-After hint when present,
+                        # otherwise back off with jitter
+                        retry_after = response.headers.get("Retry-After", "")
+                        wait = float(retry_after) if retry_after.isdigit() else backoff
+                        backoff = min(backoff * 2, 60.0)
+                        logging.warning(
+                            "Got status %d on %s, retrying in %.1fs",
+                            response.status_code,
+                            url,
+                            wait,
+                        )
+                        await asyncio.sleep(wait + random.uniform(0, 1))
+                        continue
                     logging.error(
-                        f"Failed to scrape property: {response.url} with status code {response.status_code}"
+                        "Failed to scrape property: %s with status code %s",
+                        response.url,
+                        response.status_code,
                     )
-                await asyncio.sleep(delay)
-                break
-            except (httpx.ReadTimeout, httpx.RequestError) as e:
-                logging.error(
-                    f"Attempt {attempt + 1} failed for URL: {url}, Error: {str(e)}"
-                )
-                if attempt == 2:
-                    logging.error(f"Failed to retrieve URL: {url} after 3 attempts")
-    return properties
+                    return None
+                except (httpx.ReadTimeout, httpx.RequestError) as e:
+                    logging.error(
+                        "Attempt %d failed for URL: %s, Error: %s", attempt + 1, url, e
+                    )
+                    if attempt == 2:
+                        logging.error(
+                            "Failed to retrieve URL: %s after 3 attempts", url
+                        )
+                    else:
+                        await asyncio.sleep(backoff + random.uniform(0, 1))
+                        backoff = min(backoff * 2, 60.0)
+        return None
+
+    results = await asyncio.gather(*(scrape_one(url) for url in urls))
+    return [result for result in results if result is not None]
 
 
 def save_to_json(data: List[PropertyResult], filename: str) -> None:
-    """Save data to a JSON file"""
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Save data to a JSON file atomically"""
+    # Write to a temp path and rename so the R monitors never see a
+    # half-written file in out/
+    tmp_filename = filename + ".tmp"
+    if orjson is not None:
+        with open(tmp_filename, "wb") as f:
+            f.write(
+                orjson.dumps(
+                    data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                )
+            )
+    else:
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_filename, filename)
 
 
 def save_to_csv(data: List[PropertyResult], filename: str) -> None:
-    """Save data to a CSV file"""
-    with open(filename, "w", newline="", encoding="utf-8") as csvfile:
+    """Save data to a CSV file atomically"""
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w", newline="", encoding="utf-8") as csvfile:
         fieldnames = [
             "url",
             "title",
@@ -179,44 +252,85 @@ def save_to_csv(data: List[PropertyResult], filename: str) -> None:
                     "size_sqm": property.get("size_sqm", ""),
                 }
             )
+    os.replace(tmp_filename, filename)
 
 
-async def run(base_url: str, delay: float, output_format: List[str]):
+async def run(
+    base_url: str, delay: float, output_format: List[str], concurrency: int = 3
+):
     all_property_urls = []
+    seen_urls = set()
     page_count = 1
     max_pages = 40
-
+    repeat_pages = 0
+
+    # Size the pool to the concurrency cap and keep connections alive for the
+    # whole run so pages and properties reuse the same TLS connection
+    limits = httpx.Limits(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+        keepalive_expiry=90.0,
+    )
+    headers = dict(BASE_HEADERS, **{"user-agent": random.choice(USER_AGENTS)})
     async with httpx.AsyncClient(
-        headers=BASE_HEADERS, follow_redirects=True, timeout=10.0
+        headers=headers, follow_redirects=True, timeout=10.0, limits=limits
     ) as session:
+        # Warm up the connection so the first page fetch does not pay the
+        # TCP + TLS handshake on top of its own round trip
+        try:
+            await session.head("https://" + urlparse(base_url).netloc)
+        except httpx.RequestError:
+            pass
+
         current_url = base_url
 
         while current_url and page_count <= max_pages:
-            logging.info(f"Scraping page {page_count}: {current_url}")
-            property_urls = await extract_property_urls(current_url, session, delay)
-            all_property_urls.extend(property_urls)
+            logging.info("Scraping page %d: %s", page_count, current_url)
+            property_urls, current_url = await extract_area_page(
+                current_url, session, delay
+            )
+            # Promoted listings reappear across pages; drop repeats as we go
+            new_urls = [url for url in property_urls if url not in seen_urls]
+            seen_urls.update(new_urls)
+            all_property_urls.extend(new_urls)
 
             if not property_urls:
-                logging.info("No more property URLs found, stopping pagination.")
+                # A page with no listings at all marks the end of the results
+                logging.info("No property URLs found, stopping pagination.")
                 break
 
-            current_url = await get_next_page_url(current_url, session, delay)
+            if not new_urls:
+                # A single page can legitimately consist entirely of promoted
+                # listings already seen earlier, so only stop after two such
+                # pages in a row
+                repeat_pages += 1
+                if repeat_pages >= 2:
+                    logging.info(
+                        "No new property URLs on two consecutive pages, "
+                        "stopping pagination."
+                    )
+                    break
+            else:
+                repeat_pages = 0
+
             page_count += 1
 
-        logging.info(f"Total properties found: {len(all_property_urls)}")
-        data = await scrape_properties(all_property_urls, session, delay)
+        logging.info("Total properties found: %d", len(all_property_urls))
+        data = await scrape_properties(all_property_urls, session, delay, concurrency)
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+        # File writes are blocking; run them on a worker thread so the event
+        # loop is not stalled while the files hit disk
         if "json" in output_format:
             json_filename = f"out/idealista_properties_{timestamp}.json"
-            save_to_json(data, json_filename)
-            logging.info(f"Data saved to {json_filename}")
+            await asyncio.to_thread(save_to_json, data, json_filename)
+            logging.info("Data saved to %s", json_filename)
 
         if "csv" in output_format:
             csv_filename = f"out/idealista_properties_{timestamp}.csv"
-            save_to_csv(data, csv_filename)
-            logging.info(f"Data saved to {csv_filename}")
+            await asyncio.to_thread(save_to_csv, data, csv_filename)
+            logging.info("Data saved to %s", csv_filename)
 
 
 if __name__ == "__main__":
@@ -242,7 +356,15 @@ if __name__ == "__main__":
         default="both",
         help="Choose the output format: 'csv', 'json', or 'both'",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="Maximum property requests in flight at once (default is 3)",
+    )
 
     args = parser.parse_args()
     output_formats = ["csv", "json"] if args.format == "both" else [args.format]
-    asyncio.run(run(args.url, args.delay, output_formats))
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(run(args.url, args.delay, output_formats, args.concurrency))
@@ -61,20 +61,13 @@ source "$BASE_PATH/env/bin/activate"
 
 run_scraper() {
     local format=$1
-    echo "Running Airbnb Short-Term Scraper for format: $format"
+    echo "Running Airbnb Short/Medium/Long-Term Scrapers for format: $format"
     "$BASE_PATH/env/bin/python" "$BASE_PATH/src/airbnb_scraper.py" \
-        --url "$airbnb_short_url" --format "$format" &&
-        echo "Airbnb Short-Term Scraper finished."
-
-    echo "Running Airbnb Medium-Term Scraper for format: $format"
-    "$BASE_PATH/env/bin/python" "$BASE_PATH/src/airbnb_scraper.py" \
-        --url "$airbnb_mid_url" --format "$format" &&
-        echo "Airbnb Medium-Term Scraper finished."
-
-    echo "Running Airbnb Long-Term Scraper for format: $format"
-    "$BASE_PATH/env/bin/python" "$BASE_PATH/src/airbnb_scraper.py" \
-        --url "$airbnb_long_url" --format "$format" &&
-        echo "Airbnb Long-Term Scraper finished."
+        --url "$airbnb_short_url" \
+        --url "$airbnb_mid_url" \
+        --url "$airbnb_long_url" \
+        --format "$format" &&
+        echo "Airbnb Scrapers finished."
 
     echo "Running Idealista Segovia Sale Scraper for format: $format"
     "$BASE_PATH/env/bin/python" "$BASE_PATH/src/idealista_scraper.py" \